@@ -6,34 +6,102 @@
 
 import ctypes
 import sys
-import time
+import struct
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List, Tuple
 
+logger = logging.getLogger(__name__)
+
 class DigilentJTAGInterface:
     """
     Digilent USB-JTAG interface using Adept library
     Supports direct access to USER1 instruction for JTAG-AXI bridge
     """
     
-    def __init__(self):
+    # Size of the reusable scan buffers (one 96-bit bridge command)
+    SCAN_BUFFER_BYTES = 12
+    
+    # Run-Test/Idle TCK cycles that give an AXI transaction time to complete
+    AXI_WAIT_CYCLES = 100
+    
+    def __init__(self, tag: Optional[str] = None):
         self.device_handle = None
         self.is_connected = False
         self.adept_lib = None
+        self.dmgr_lib = None
+        # Prefix for printed messages, e.g. the device name when several
+        # interfaces print from different threads
+        self.tag = tag
+        # Scan buffers reused across calls instead of allocated per scan
+        self._tdi_buf = (ctypes.c_ubyte * self.SCAN_BUFFER_BYTES)()
+        self._tdo_buf = (ctypes.c_ubyte * self.SCAN_BUFFER_BYTES)()
+        # Byte views for filling/reading the buffers without extra copies
+        self._tdi_mv = memoryview(self._tdi_buf).cast('B')
+        self._tdo_mv = memoryview(self._tdo_buf).cast('B')
+        # Single-byte buffer for the fixed 6-bit IR scan
+        self._ir_buf = (ctypes.c_ubyte * 1)()
+        # Guards the shared scan buffers and keeps IR+DR sequences atomic
+        # when the interface is used from several threads
+        self._lock = threading.RLock()
         self._load_adept_library()
     
+    def _print(self, message: str) -> None:
+        """Print a message prefixed with the tag in a single write"""
+        if self.tag:
+            text = message.lstrip('\n')
+            message = message[:len(message) - len(text)] + f"[{self.tag}] {text}"
+        # One write per line so lines from different threads do not merge
+        sys.stdout.write(message + '\n')
+    
     def _load_adept_library(self):
         """Load Digilent Adept library"""
         try:
             # Try to load Adept library (adjust path as needed)
             if sys.platform.startswith('win'):
                 self.adept_lib = ctypes.CDLL('djtg.dll')
+                self.dmgr_lib = ctypes.CDLL('dmgr.dll')
             else:
                 self.adept_lib = ctypes.CDLL('libdjtg.so')
-            print("Digilent Adept library loaded successfully")
+                self.dmgr_lib = ctypes.CDLL('libdmgr.so')
+            self._declare_prototypes()
+            self._print("Digilent Adept library loaded successfully")
         except Exception as e:
-            print(f"Failed to load Adept library: {e}")
-            print("Please install Digilent Adept Runtime")
+            self._print(f"Failed to load Adept library: {e}")
+            self._print("Please install Digilent Adept Runtime")
             self.adept_lib = None
+            self.dmgr_lib = None
+    
+    def _declare_prototypes(self):
+        """Declare argtypes/restype for the Adept functions used here"""
+        # Types from dpcdecl.h: HIF and DWORD are 32-bit unsigned, BOOL is int
+        HIF = ctypes.c_uint32
+        DWORD = ctypes.c_uint32
+        BOOL = ctypes.c_int
+        PBYTE = ctypes.POINTER(ctypes.c_ubyte)
+        
+        djtg_prototypes = {
+            'DjtgEnable': [HIF],
+            'DjtgDisable': [HIF],
+            'DjtgSetSpeed': [HIF, DWORD, ctypes.POINTER(DWORD)],
+            'DjtgPutTdiBits': [HIF, BOOL, PBYTE, PBYTE, DWORD, BOOL],
+            'DjtgPutTmsBits': [HIF, BOOL, PBYTE, PBYTE, DWORD, BOOL],
+            'DjtgPutTmsTdiBits': [HIF, PBYTE, PBYTE, DWORD, BOOL],
+            'DjtgClockTck': [HIF, BOOL, BOOL, DWORD, BOOL],
+        }
+        dmgr_prototypes = {
+            'DmgrOpen': [ctypes.POINTER(HIF), ctypes.c_char_p],
+            'DmgrClose': [HIF],
+            'DmgrEnumDevices': [ctypes.POINTER(ctypes.c_int)],
+        }
+        
+        for lib, prototypes in ((self.adept_lib, djtg_prototypes),
+                                (self.dmgr_lib, dmgr_prototypes)):
+            for name, argtypes in prototypes.items():
+                func = getattr(lib, name)
+                func.argtypes = argtypes
+                func.restype = BOOL
     
     def enumerate_devices(self) -> List[str]:
         """Enumerate available Digilent devices"""
@@ -46,26 +114,26 @@ class DigilentJTAGInterface:
             # This is a simplified version - actual implementation would use:
             # DmgrEnumDevices, DmgrGetDvc, etc.
             
-            print("Enumerating Digilent USB-JTAG devices...")
+            self._print("Enumerating Digilent USB-JTAG devices...")
             # For demonstration, return mock device list
             devices = ["Digilent USB-JTAG Device 0", "Mock Device for Testing"]
             
         except Exception as e:
-            print(f"Device enumeration failed: {e}")
+            self._print(f"Device enumeration failed: {e}")
         
         return devices
     
     def connect(self, device_name: Optional[str] = None) -> bool:
         """Connect to Digilent USB-JTAG device"""
         if not self.adept_lib:
-            print("Adept library not available")
+            self._print("Adept library not available")
             return False
         
         try:
             # Implement device connection using Adept API
             # This would use: DmgrOpen, DjtgEnable, etc.
             
-            print(f"Connecting to device: {device_name or 'Auto-detect'}")
+            self._print(f"Connecting to device: {device_name or 'Auto-detect'}")
             
             # Mock implementation for demonstration
             self.device_handle = 1  # Mock handle
@@ -74,11 +142,11 @@ class DigilentJTAGInterface:
             # Configure JTAG capabilities
             self._configure_jtag()
             
-            print("Connected to Digilent USB-JTAG successfully")
+            self._print("Connected to Digilent USB-JTAG successfully")
             return True
             
         except Exception as e:
-            print(f"Connection failed: {e}")
+            self._print(f"Connection failed: {e}")
             return False
     
     def _configure_jtag(self):
@@ -93,59 +161,112 @@ class DigilentJTAGInterface:
             # Enable batch mode for better performance
             # DjtgSetBatchMode(self.device_handle, True)
             
-            print("JTAG configuration completed")
+            logger.debug("JTAG configuration completed")
             
         except Exception as e:
-            print(f"JTAG configuration failed: {e}")
+            logger.error(f"JTAG configuration failed: {e}")
     
     def shift_ir(self, instruction: int, ir_length: int = 6) -> bool:
         """Shift instruction register (USER1 = 0x02)"""
         if not self.is_connected:
-            print("Device not connected")
+            logger.error("Device not connected")
             return False
         
         try:
-            print(f"Shifting IR: 0x{instruction:02x} ({ir_length} bits)")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Shifting IR: 0x{instruction:02x} ({ir_length} bits)")
             
             # Implement IR shift using Adept API
             # This would use: DjtgPutTmsBits, DjtgPutTdiBits, etc.
             
-            # For USER1 instruction
-            if instruction == 0x02:
-                print("USER1 instruction selected")
-            
             return True
             
         except Exception as e:
-            print(f"IR shift failed: {e}")
+            logger.error(f"IR shift failed: {e}")
             return False
     
-    def shift_dr(self, data: int, dr_length: int = 96) -> Tuple[bool, int]:
-        """Shift data register (96-bit command)"""
+    def shift_dr(self, data: bytes, dr_length: int = 96) -> Tuple[bool, int]:
+        """Shift data register (96-bit command as LSB-first bytes)"""
         if not self.is_connected:
-            print("Device not connected")
+            logger.error("Device not connected")
+            return False, 0
+        
+        num_bytes = (dr_length + 7) // 8
+        if num_bytes > self.SCAN_BUFFER_BYTES:
+            logger.error(f"DR scans longer than {8 * self.SCAN_BUFFER_BYTES} bits are not supported")
             return False, 0
         
         try:
-            print(f"Shifting DR: 0x{data:024x} ({dr_length} bits)")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Shifting DR: 0x{data[::-1].hex()} ({dr_length} bits)")
             
-            # Implement DR shift using Adept API
-            # This would use batch mode for 96-bit transfer
+            with self._lock:
+                response_data = self._shift_dr_buffers(data, dr_length)
             
-            # Mock response data
-            response_data = 0x123456789ABCDEF012345678
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"DR shift completed, response: 0x{response_data:024x}")
+            return True, response_data
             
-            print(f"DR shift completed, response: 0x{response_data:024x}")
+        except Exception as e:
+            logger.error(f"DR shift failed: {e}")
+            return False, 0
+    
+    def _shift_dr_buffers(self, data: bytes, dr_length: int) -> int:
+        """Shift a DR scan through the persistent buffers; the caller holds the lock"""
+        num_bytes = len(data)
+        self._tdi_mv[:num_bytes] = data
+        
+        # Implement DR shift using Adept API
+        # This would use batch mode for 96-bit transfer; ctypes.CDLL
+        # releases the GIL for the call, and the declared prototype
+        # converts and checks the arguments:
+        # DjtgPutTdiBits(self.device_handle, False, self._tdi_buf, self._tdo_buf, dr_length, False)
+        # return int.from_bytes(self._tdo_mv[:num_bytes], 'little')
+        
+        # Mock response data
+        return 0x123456789ABCDEF012345678
+    
+    def shift_ir_6(self, instruction: int) -> bool:
+        """Shift a 6-bit instruction (7-series IR length) without length handling"""
+        if not self.is_connected:
+            logger.error("Device not connected")
+            return False
+        
+        try:
+            with self._lock:
+                self._ir_buf[0] = instruction & 0x3F
+                # Implement IR shift using Adept API:
+                # DjtgPutTdiBits(self.device_handle, False, self._ir_buf, None, 6, False)
+            return True
+            
+        except Exception as e:
+            logger.error(f"IR shift failed: {e}")
+            return False
+    
+    def shift_dr_96(self, data: bytes) -> Tuple[bool, int]:
+        """Shift a 96-bit bridge command (12 LSB-first bytes) through the fixed buffers"""
+        if not self.is_connected:
+            logger.error("Device not connected")
+            return False, 0
+        
+        try:
+            with self._lock:
+                response_data = self._shift_dr_buffers(data, 96)
             return True, response_data
             
         except Exception as e:
-            print(f"DR shift failed: {e}")
+            logger.error(f"DR shift failed: {e}")
             return False, 0
     
+    def _idle_tck(self, cycles: int) -> None:
+        """Clock TCK in Run-Test/Idle; the caller holds the lock"""
+        # Implement TCK clocking using Adept API:
+        # DjtgClockTck(self.device_handle, False, False, cycles, False)
+    
     def led_write(self, led_pattern: int) -> bool:
         """Write LED pattern via JTAG-AXI bridge"""
         if not self.is_connected:
-            print("Device not connected")
+            self._print("Device not connected")
             return False
         
         # LED register address (assuming base address)
@@ -156,29 +277,30 @@ class DigilentJTAGInterface:
         addr = led_addr
         data = led_pattern & 0xF  # Mask to 4 bits
         
-        # Pack into 96-bit value
-        command_96bit = (data << 64) | (addr << 32) | cmd
+        # Pack into 96-bit LSB-first byte buffer
+        command_96bit = struct.pack('<III', cmd, addr, data)
         
-        print(f"Writing LED pattern: 0b{data:04b}")
-        
-        # Step 1: Select USER1 instruction
-        if not self.shift_ir(0x02, 6):
-            return False
+        self._print(f"Writing LED pattern: 0b{data:04b}")
         
-        # Step 2: Shift 96-bit command
-        success, response = self.shift_dr(command_96bit, 96)
+        with self._lock:
+            # Step 1: Select USER1 instruction
+            if not self.shift_ir_6(0x02):
+                return False
+            
+            # Step 2: Shift 96-bit command
+            success, response = self.shift_dr_96(command_96bit)
         
         if success:
-            print(f"LED write completed successfully")
+            self._print(f"LED write completed successfully")
             return True
         else:
-            print("LED write failed")
+            self._print("LED write failed")
             return False
     
     def led_read(self) -> Tuple[bool, int]:
         """Read LED register via JTAG-AXI bridge"""
         if not self.is_connected:
-            print("Device not connected")
+            self._print("Device not connected")
             return False, 0
         
         # LED register address
@@ -189,27 +311,65 @@ class DigilentJTAGInterface:
         addr = led_addr
         dummy = 0x00000000
         
-        # Pack into 96-bit value
-        command_96bit = (dummy << 64) | (addr << 32) | cmd
-        
-        print("Reading LED register...")
+        # Pack into 96-bit LSB-first byte buffer
+        command_96bit = struct.pack('<III', cmd, addr, dummy)
         
-        # Step 1: Select USER1 instruction
-        if not self.shift_ir(0x02, 6):
-            return False, 0
+        self._print("Reading LED register...")
         
-        # Step 2: Shift read command
-        success, response = self.shift_dr(command_96bit, 96)
+        with self._lock:
+            # Step 1: Select USER1 instruction
+            if not self.shift_ir_6(0x02):
+                return False, 0
+            
+            # Step 2: Shift read command
+            success, response = self.shift_dr_96(command_96bit)
         
         if success:
             # Extract read data from response (implementation dependent)
             led_data = response & 0xF  # Assume lower 4 bits contain LED data
-            print(f"LED read completed: 0b{led_data:04b}")
+            self._print(f"LED read completed: 0b{led_data:04b}")
             return True, led_data
         else:
-            print("LED read failed")
+            self._print("LED read failed")
             return False, 0
     
+    def led_write_read_many(self, led_patterns: List[int]) -> Optional[List[int]]:
+        """Write each LED pattern and read it back in one locked scan sequence"""
+        if not self.is_connected:
+            self._print("Device not connected")
+            return None
+        
+        # LED register address
+        led_addr = 0x43C00000
+        
+        # Commands packed once for all patterns: WRITE header, READ and NOP
+        write_hdr = struct.pack('<II', 0x00000001, led_addr)
+        read_cmd = struct.pack('<III', 0x00000002, led_addr, 0)
+        nop_cmd = bytes(self.SCAN_BUFFER_BYTES)
+        
+        read_values = []
+        with self._lock:
+            # USER1 stays selected for the whole sequence
+            if not self.shift_ir_6(0x02):
+                return None
+            
+            for pattern in led_patterns:
+                # The bridge returns read data on the scan after the READ, so
+                # each pattern takes WRITE, READ and NOP, idling after the
+                # WRITE and the READ while the AXI transaction runs
+                write_ok, _ = self.shift_dr_96(write_hdr + struct.pack('<I', pattern & 0xF))
+                self._idle_tck(self.AXI_WAIT_CYCLES)
+                read_ok, _ = self.shift_dr_96(read_cmd)
+                self._idle_tck(self.AXI_WAIT_CYCLES)
+                nop_ok, response = self.shift_dr_96(nop_cmd)
+                if not (write_ok and read_ok and nop_ok):
+                    return None
+                
+                # Same LED data extraction as led_read()
+                read_values.append(response & 0xF)
+        
+        return read_values
+    
     def disconnect(self):
         """Disconnect from device"""
         if self.is_connected:
@@ -219,50 +379,59 @@ class DigilentJTAGInterface:
                 
                 self.is_connected = False
                 self.device_handle = None
-                print("Disconnected from Digilent USB-JTAG")
+                self._print("Disconnected from Digilent USB-JTAG")
                 
             except Exception as e:
-                print(f"Disconnection error: {e}")
+                self._print(f"Disconnection error: {e}")
 
 # Example usage and test functions
-def test_led_patterns():
-    """Test LED control with various patterns"""
-    jtag = DigilentJTAGInterface()
-    
-    # Enumerate and connect
-    devices = jtag.enumerate_devices()
-    if not devices:
-        print("No Digilent devices found")
-        return
+def run_led_test(device_name: str) -> bool:
+    """Run the LED pattern test on a single device"""
+    jtag = DigilentJTAGInterface(tag=device_name)
     
-    if not jtag.connect(devices[0]):
-        print("Failed to connect to device")
-        return
+    if not jtag.connect(device_name):
+        jtag._print("Failed to connect to device")
+        return False
     
     # Test LED patterns
     test_patterns = [0x0, 0xF, 0xA, 0x5, 0x1, 0x2, 0x4, 0x8]
     pattern_names = ["OFF", "ALL_ON", "ALT1", "ALT2", "LED0", "LED1", "LED2", "LED3"]
     
-    for pattern, name in zip(test_patterns, pattern_names):
-        print(f"\\nTesting pattern {name}: 0b{pattern:04b}")
-        
-        # Write pattern
-        if jtag.led_write(pattern):
-            time.sleep(0.2)
-            
-            # Read back for verification
-            success, read_data = jtag.led_read()
-            if success and read_data == pattern:
-                print(f"✓ Pattern {name} verified")
+    jtag._print(f"\nTesting {len(test_patterns)} LED patterns")
+    
+    # Write and read back all patterns in one scan sequence, then compare
+    read_back = jtag.led_write_read_many(test_patterns)
+    if read_back is None:
+        jtag._print("✗ LED write/read sequence failed")
+        test_passed = False
+    else:
+        test_passed = True
+        for pattern, name, read_data in zip(test_patterns, pattern_names, read_back):
+            if read_data == pattern:
+                jtag._print(f"✓ Pattern {name} verified")
             else:
-                print(f"✗ Pattern {name} verification failed")
-        else:
-            print(f"✗ Failed to write pattern {name}")
-        
-        time.sleep(0.3)
+                jtag._print(f"✗ Pattern {name} verification failed: read 0b{read_data:04b}")
+                test_passed = False
     
     # Disconnect
     jtag.disconnect()
+    return test_passed
+
+def test_led_patterns():
+    """Test LED control with various patterns on all connected devices"""
+    devices = DigilentJTAGInterface().enumerate_devices()
+    if not devices:
+        print("No Digilent devices found")
+        return
+    
+    # Devices are independent and Adept calls release the GIL, so each
+    # device is tested in its own thread
+    with ThreadPoolExecutor(max_workers=len(devices)) as executor:
+        results = list(executor.map(run_led_test, devices))
+    
+    for device_name, test_passed in zip(devices, results):
+        print(f"{'✓' if test_passed else '✗'} {device_name}: "
+              f"{'all patterns verified' if test_passed else 'test failed'}")
 
 def main():
     """Main function for standalone execution"""
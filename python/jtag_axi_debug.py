@@ -7,45 +7,100 @@ Description: Python tool for controlling JTAG-AXI bridge using OpenOCD or PyJTAG
 """
 
 import os
+import re
 import sys
-import time
+import mmap
+import ctypes
 import socket
 import struct
 import logging
+import threading
 from typing import Optional, Union
-from abc import ABC, abstractmethod
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-class JTAGInterface(ABC):
-    """Abstract base class for JTAG interfaces"""
+def _hex_to_scan_bytes(hex_digits: str, length: int) -> bytes:
+    """Convert an MSB-first hex string into an LSB-first scan buffer of length bits"""
+    # Works byte-wise so no scan ever needs an int wider than 64 bits
+    num_bytes = (length + 7) // 8
+    if num_bytes == 0:
+        return b''
+    buf = bytearray(bytes.fromhex(hex_digits.rjust(2 * num_bytes, '0')[-2 * num_bytes:])[::-1])
+    if length % 8:
+        buf[-1] &= (1 << (length % 8)) - 1
+    return bytes(buf)
+
+class JTAGInterface:
+    """Base class for JTAG interfaces
+    
+    Subclasses must override connect, disconnect, shift_ir, shift_dr, flush,
+    run_clock, shift_batch and reset_tap; shift_ir_6, shift_dr_96 and
+    shift_dr_pair are built on those and may be overridden.
+    """
+    
+    _REQUIRED_METHODS = ('connect', 'disconnect', 'shift_ir', 'shift_dr', 'flush',
+                         'run_clock', 'shift_batch', 'reset_tap')
+    
+    def __init_subclass__(cls, **kwargs):
+        # Checked once at class definition, so a missing method fails at
+        # import instead of on first use without an ABC instantiation check
+        super().__init_subclass__(**kwargs)
+        missing = [name for name in cls._REQUIRED_METHODS
+                   if getattr(cls, name) is getattr(JTAGInterface, name)]
+        if missing:
+            raise TypeError(f"{cls.__name__} must override: {', '.join(missing)}")
     
-    @abstractmethod
     def connect(self) -> bool:
         """Connect to JTAG adapter"""
-        pass
+        raise NotImplementedError
     
-    @abstractmethod
     def disconnect(self) -> None:
         """Disconnect from JTAG adapter"""
-        pass
+        raise NotImplementedError
     
-    @abstractmethod
-    def shift_ir(self, data: int, length: int) -> int:
+    def shift_ir(self, data: int, length: int, sync: bool = True) -> int:
         """Shift data into instruction register"""
-        pass
-    
-    @abstractmethod
-    def shift_dr(self, data: int, length: int) -> int:
-        """Shift data into data register"""
-        pass
+        raise NotImplementedError
+    
+    def shift_dr(self, data: bytes, length: int, sync: bool = True) -> bytes:
+        """Shift data into data register (LSB-first byte buffer)"""
+        raise NotImplementedError
+    
+    def flush(self) -> None:
+        """Complete all shifts issued with sync=False"""
+        raise NotImplementedError
+    
+    def run_clock(self, cycles: int, sync: bool = True) -> None:
+        """Clock TCK for the given number of cycles in Run-Test/Idle"""
+        raise NotImplementedError
+    
+    def shift_batch(self, ops: list) -> list:
+        """Shift a list of ('ir'|'dr'|'tck', data, length) operations in one transfer"""
+        raise NotImplementedError
+    
+    def shift_ir_6(self, data: int, sync: bool = True) -> int:
+        """Shift a 6-bit instruction (7-series IR length)"""
+        return self.shift_ir(data, 6, sync)
+    
+    def shift_dr_96(self, data: bytes, sync: bool = True) -> bytes:
+        """Shift a 96-bit bridge command (12 LSB-first bytes)"""
+        return self.shift_dr(data, 96, sync)
+    
+    def shift_dr_pair(self, data1: bytes, data2: bytes, length: int,
+                      idle_cycles: int = 0) -> tuple:
+        """Shift two DR scans in one transfer, optionally idling TCK between them"""
+        ops = [('dr', data1, length)]
+        if idle_cycles:
+            ops.append(('tck', 0, idle_cycles))
+        ops.append(('dr', data2, length))
+        results = self.shift_batch(ops)
+        return results[0], results[-1]
     
-    @abstractmethod
     def reset_tap(self) -> None:
         """Reset TAP controller"""
-        pass
+        raise NotImplementedError
 
 class DigilentInterface(JTAGInterface):
     """Digilent USB-JTAG interface using Adept library"""
@@ -55,14 +110,12 @@ class DigilentInterface(JTAGInterface):
         self.device_handle = None
         self.connected = False
         self.adept_lib = None
+        self._unsynced = 0
         
     def connect(self) -> bool:
         """Connect to Digilent USB-JTAG device"""
         try:
             # Load Digilent Adept library
-            import ctypes
-            import sys
-            
             if sys.platform.startswith('win'):
                 self.adept_lib = ctypes.CDLL('djtg.dll')
             else:
@@ -93,14 +146,22 @@ class DigilentInterface(JTAGInterface):
             self.device_handle = None
             logger.info("Disconnected from Digilent USB-JTAG")
     
-    def shift_ir(self, data: int, length: int) -> int:
+    def shift_ir(self, data: int, length: int, sync: bool = True) -> int:
         """Shift instruction register"""
         if not self.connected:
             return 0
         
         try:
             # Implement IR shift using Adept API
-            logger.debug(f"Shifting IR: 0x{data:02x} ({length} bits)")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Shifting IR: 0x{data:02x} ({length} bits)")
+            
+            # Without sync the shift stays in the Adept buffer and no
+            # TDO data is available until the next flush
+            if not sync:
+                self._unsynced += 1
+                return 0
+            self.flush()
             
             # Mock implementation - replace with actual Adept calls
             return data
@@ -109,22 +170,82 @@ class DigilentInterface(JTAGInterface):
             logger.error(f"IR shift failed: {e}")
             return 0
     
-    def shift_dr(self, data: int, length: int) -> int:
+    def shift_dr(self, data: bytes, length: int, sync: bool = True) -> bytes:
         """Shift data register"""
         if not self.connected:
-            return 0
+            return bytes(len(data))
         
         try:
             # Implement DR shift using Adept API batch mode
-            logger.debug(f"Shifting DR: 0x{data:024x} ({length} bits)")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Shifting DR: 0x{data[::-1].hex()} ({length} bits)")
+            
+            # The byte buffer is handed to DjtgPutTdiBits as is
+            tdi = (ctypes.c_ubyte * len(data)).from_buffer_copy(data)
+            
+            if not sync:
+                self._unsynced += 1
+                return bytes(len(data))
+            self.flush()
             
             # Mock implementation - replace with actual Adept calls
             # Use batch mode for 96-bit transfers to improve performance
-            return data
+            return bytes(tdi)
             
         except Exception as e:
             logger.error(f"DR shift failed: {e}")
-            return 0
+            return bytes(len(data))
+    
+    def flush(self) -> None:
+        """Synchronize the Adept transfer buffer"""
+        if self.connected and self._unsynced:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Syncing {self._unsynced} buffered shifts")
+            # DjtgSyncBuffer(self.device_handle)
+            self._unsynced = 0
+    
+    def run_clock(self, cycles: int, sync: bool = True) -> None:
+        """Clock TCK with TMS low to stay in Run-Test/Idle"""
+        if not self.connected:
+            return
+        
+        try:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Clocking TCK: {cycles} cycles")
+            
+            if not sync:
+                self._unsynced += 1
+                return
+            self.flush()
+            
+            # Mock implementation - replace with actual Adept calls:
+            # DjtgClockTck(self.device_handle, False, False, cycles, False)
+            
+        except Exception as e:
+            logger.error(f"TCK clocking failed: {e}")
+    
+    def shift_batch(self, ops: list) -> list:
+        """Shift queued IR/DR/TCK operations as a single Adept batch"""
+        if not self.connected:
+            return [0] * len(ops)
+        
+        try:
+            # Concatenate TMS/TDI bitstreams of all operations into one
+            # DjtgPutTdiBits batch-mode transfer (one USB frame per batch)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Shifting batch: {len(ops)} operations")
+            
+            # The batch is synchronized as a whole, including earlier
+            # unsynced shifts still in the buffer
+            self._unsynced = 0
+            
+            # Mock implementation - replace with actual Adept calls;
+            # 'tck' operations become DjtgClockTck calls in the batch
+            return [0 if kind == 'tck' else data for kind, data, length in ops]
+            
+        except Exception as e:
+            logger.error(f"Batch shift failed: {e}")
+            return [0] * len(ops)
     
     def reset_tap(self) -> None:
         """Reset TAP controller"""
@@ -135,18 +256,29 @@ class DigilentInterface(JTAGInterface):
 class OpenOCDInterface(JTAGInterface):
     """OpenOCD-based JTAG interface using TCL commands over socket"""
     
+    # Separator between command results in a multi-command script
+    SCRIPT_SEPARATOR = '---'
+    
+    # OpenOCD TCL server terminates commands and responses with 0x1a
+    COMMAND_TERMINATOR = b'\x1a'
+    
     def __init__(self, host: str = 'localhost', port: int = 6666):
         self.host = host
         self.port = port
         self.socket = None
         self.connected = False
+        self._pending = []
+        self._rx_buffer = bytearray()
     
     def connect(self) -> bool:
         """Connect to OpenOCD via TCL interface"""
         try:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.socket.settimeout(5.0)
+            # Disable Nagle so small TCL commands are sent immediately
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             self.socket.connect((self.host, self.port))
+            self._rx_buffer = bytearray()
             self.connected = True
             logger.info(f"Connected to OpenOCD at {self.host}:{self.port}")
             
@@ -162,6 +294,12 @@ class OpenOCDInterface(JTAGInterface):
     def disconnect(self) -> None:
         """Disconnect from OpenOCD"""
         if self.socket:
+            # Send scans still deferred before closing the connection
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Failed to send deferred commands: {e}")
+                self._pending = []
             self.socket.close()
             self.socket = None
             self.connected = False
@@ -174,41 +312,143 @@ class OpenOCDInterface(JTAGInterface):
         
         try:
             # Send command
-            self.socket.send((command + '\n').encode())
+            self.socket.sendall(command.encode() + self.COMMAND_TERMINATOR)
             
             # Receive response
-            response = self.socket.recv(4096).decode().strip()
-            return response
+            return self._read_response()
             
         except Exception as e:
             logger.error(f"Command failed: {command}, Error: {e}")
+            # The rest of an unfinished response could still arrive and be
+            # taken as the reply to the next command, so drop the connection
+            self._rx_buffer = bytearray()
+            self._pending = []
+            self.socket.close()
+            self.socket = None
+            self.connected = False
             raise
     
-    def shift_ir(self, data: int, length: int) -> int:
-        """Shift data into instruction register"""
-        command = f"irscan chip.tap 0x{data:0{(length+3)//4}x}"
-        response = self._send_command(command)
-        # Parse response to get shifted out data
-        return 0  # Simplified for this example
+    def _read_response(self) -> str:
+        """Read one terminated response, keeping any bytes that follow it"""
+        while True:
+            end = self._rx_buffer.find(self.COMMAND_TERMINATOR)
+            if end >= 0:
+                response = bytes(self._rx_buffer[:end])
+                del self._rx_buffer[:end + 1]
+                return response.decode().strip()
+            
+            chunk = self.socket.recv(65536)
+            if not chunk:
+                raise ConnectionError("OpenOCD closed the connection")
+            self._rx_buffer += chunk
+    
+    def _send_script(self, commands: list) -> list:
+        """Send several TCL commands as one script and split the responses"""
+        # Collect every command result into one reply, separated by a sentinel
+        script = "join [list " + " ".join(f"[{cmd}]" for cmd in commands) + \
+                 f"] {self.SCRIPT_SEPARATOR}"
+        response = self._send_command(script)
+        
+        results = [part.strip() for part in response.split(self.SCRIPT_SEPARATOR)]
+        if len(results) != len(commands):
+            raise RuntimeError(f"Expected {len(commands)} script results, got {len(results)}")
+        return results
     
-    def shift_dr(self, data: int, length: int) -> int:
-        """Shift data into data register"""
+    def _ir_command(self, data: int, length: int) -> str:
+        """Build irscan command"""
+        return f"irscan chip.tap 0x{data:0{(length+3)//4}x}"
+    
+    def _dr_command(self, data: bytes, length: int) -> str:
+        """Build drscan command"""
         hex_digits = (length + 3) // 4
-        command = f"drscan chip.tap {length} 0x{data:0{hex_digits}x}"
-        response = self._send_command(command)
-        
-        # Parse the response to extract the shifted out data
+        return f"drscan chip.tap {length} 0x{data[::-1].hex()[-hex_digits:]}"
+    
+    def _parse_dr_response(self, response: str, length: int) -> bytes:
+        """Parse the shifted out data from a drscan response"""
+        num_bytes = (length + 7) // 8
         try:
             # OpenOCD typically returns hex values
             if '0x' in response:
-                return int(response.split('0x')[1].split()[0], 16)
+                return _hex_to_scan_bytes(response.split('0x')[1].split()[0], length)
             else:
-                return 0
+                return bytes(num_bytes)
         except:
+            return bytes(num_bytes)
+    
+    def _run_ir_command(self, command: str, sync: bool) -> int:
+        """Send or defer an irscan command"""
+        if not sync:
+            self._pending.append(command)
             return 0
+        self.flush()
+        response = self._send_command(command)
+        # Parse response to get shifted out data
+        return 0  # Simplified for this example
+    
+    def _run_dr_command(self, command: str, length: int, sync: bool) -> bytes:
+        """Send or defer a drscan command"""
+        if not sync:
+            self._pending.append(command)
+            return bytes((length + 7) // 8)
+        self.flush()
+        response = self._send_command(command)
+        
+        # Parse the response to extract the shifted out data
+        return self._parse_dr_response(response, length)
+    
+    def shift_ir(self, data: int, length: int, sync: bool = True) -> int:
+        """Shift data into instruction register"""
+        return self._run_ir_command(self._ir_command(data, length), sync)
+    
+    def shift_dr(self, data: bytes, length: int, sync: bool = True) -> bytes:
+        """Shift data into data register"""
+        return self._run_dr_command(self._dr_command(data, length), length, sync)
+    
+    def shift_ir_6(self, data: int, sync: bool = True) -> int:
+        """Shift a 6-bit instruction with the irscan width fixed"""
+        return self._run_ir_command(f"irscan chip.tap 0x{data & 0x3F:02x}", sync)
+    
+    def shift_dr_96(self, data: bytes, sync: bool = True) -> bytes:
+        """Shift a 96-bit bridge command with the drscan width fixed"""
+        return self._run_dr_command(f"drscan chip.tap 96 0x{data[::-1].hex()}", 96, sync)
+    
+    def flush(self) -> None:
+        """Send all deferred commands as a single TCL script"""
+        if self._pending:
+            commands = self._pending
+            self._pending = []
+            self._send_script(commands)
+    
+    def run_clock(self, cycles: int, sync: bool = True) -> None:
+        """Clock TCK in Run-Test/Idle"""
+        command = f"runtest {cycles}"
+        if not sync:
+            self._pending.append(command)
+            return
+        self.flush()
+        self._send_command(command)
+    
+    def shift_batch(self, ops: list) -> list:
+        """Shift a list of IR/DR/TCK operations in one TCL round-trip"""
+        commands = self._pending
+        self._pending = []
+        for kind, data, length in ops:
+            if kind == 'ir':
+                commands.append(self._ir_command(data, length))
+            elif kind == 'tck':
+                commands.append(f"runtest {length}")
+            else:
+                commands.append(self._dr_command(data, length))
+        
+        # Deferred commands are sent even when ops is empty
+        responses = self._send_script(commands) if commands else []
+        responses = responses[-len(ops):] if ops else []
+        return [self._parse_dr_response(response, length) if kind == 'dr' else 0
+                for (kind, data, length), response in zip(ops, responses)]
     
     def reset_tap(self) -> None:
-        """Reset TAP controller"""
+        """Reset TAP controller after any deferred scans"""
+        self.flush()
         self._send_command("pathmove RESET IDLE")
 
 class JTAGAXIBridge:
@@ -219,6 +459,13 @@ class JTAGAXIBridge:
     CMD_READ = 0x00000002
     CMD_NOP = 0x00000000
     
+    # Run-Test/Idle TCK cycles that give an AXI transaction time to
+    # complete; the bridge does not report completion over JTAG
+    AXI_WAIT_CYCLES = 100
+    
+    # Maximum number of buffered writes before they are flushed
+    MAX_PENDING_WRITES = 64
+    
     # JTAG parameters
     USER1_INSTRUCTION = 0x02  # USER1 for most Xilinx devices
     IR_LENGTH = 6  # Instruction register length for Xilinx 7-series
@@ -226,84 +473,181 @@ class JTAGAXIBridge:
     
     def __init__(self, jtag_interface: JTAGInterface):
         self.jtag = jtag_interface
+        # Bound scan methods cached for the per-transaction hot path; the
+        # fixed-width scans match IR_LENGTH and DR_LENGTH
+        self._shift_ir_6 = jtag_interface.shift_ir_6
+        self._shift_dr_96 = jtag_interface.shift_dr_96
+        self._shift_dr_pair = jtag_interface.shift_dr_pair
+        self._run_clock = jtag_interface.run_clock
+        self._flush_pending = False
+        self._pending_writes = 0
+        self._nop_cmd = self._pack_command(self.CMD_NOP, 0)
+        # Instruction currently loaded in the TAP, None when unknown
+        self._current_ir = None
+        # Serializes transactions when one bridge is shared between threads
+        self._lock = threading.RLock()
     
     def connect(self) -> bool:
         """Connect to JTAG interface"""
+        self._current_ir = None
         return self.jtag.connect()
     
     def disconnect(self) -> None:
         """Disconnect from JTAG interface"""
+        self.flush()
         self.jtag.disconnect()
+        self._current_ir = None
     
-    def _select_user1(self) -> None:
-        """Select USER1 instruction"""
-        self.jtag.shift_ir(self.USER1_INSTRUCTION, self.IR_LENGTH)
-    
-    def _pack_command(self, cmd: int, addr: int, data: int = 0) -> int:
-        """Pack command, address and data into 96-bit value"""
-        # Bit order: [data:31:0][addr:31:0][cmd:31:0]
-        packed = (data << 64) | (addr << 32) | cmd
-        return packed
+    def reset_tap(self) -> None:
+        """Reset TAP controller, which also clears the loaded instruction"""
+        with self._lock:
+            self.flush()
+            self.jtag.reset_tap()
+            self._current_ir = None
+    
+    def flush(self) -> bool:
+        """Send buffered writes and their wait cycles to the JTAG adapter"""
+        with self._lock:
+            if not self._flush_pending:
+                return True
+            self._flush_pending = False
+            self._pending_writes = 0
+            
+            try:
+                self.jtag.flush()
+                return True
+                
+            except Exception as e:
+                logger.error(f"Flush failed: {e}")
+                self._current_ir = None
+                return False
     
-    def _unpack_response(self, response: int) -> tuple:
+    def _select_user1(self, sync: bool = True) -> None:
+        """Select USER1 instruction unless it is already loaded"""
+        # With sync=False the cache is marked before the IR scan reaches the
+        # adapter; every path that can lose the deferred scan (flush, write,
+        # read failures) resets _current_ir so the next call reloads USER1
+        if self._current_ir != self.USER1_INSTRUCTION:
+            self._shift_ir_6(self.USER1_INSTRUCTION, sync=sync)
+            self._current_ir = self.USER1_INSTRUCTION
+    
+    def _pack_command(self, cmd: int, addr: int, data: int = 0) -> bytes:
+        """Pack command, address and data into 96-bit byte buffer"""
+        # Bit order: [data:31:0][addr:31:0][cmd:31:0], shifted LSB first
+        return struct.pack('<III', cmd & 0xFFFFFFFF, addr & 0xFFFFFFFF, data & 0xFFFFFFFF)
+    
+    def _unpack_response(self, response: bytes) -> tuple:
         """Unpack 96-bit response into status and data"""
-        data = (response >> 64) & 0xFFFFFFFF
-        status = (response >> 32) & 0xFFFFFFFF
+        _, status, data = struct.unpack('<III', response)
         return status, data
     
     def write(self, addr: int, data: int) -> bool:
         """Perform AXI write operation via JTAG"""
-        try:
-            logger.info(f"JTAG Write: Addr=0x{addr:08x}, Data=0x{data:08x}")
-            
-            # Select USER1 instruction
-            self._select_user1()
-            
-            # Pack write command
-            cmd_data = self._pack_command(self.CMD_WRITE, addr, data)
-            
-            # Shift command into DR
-            self.jtag.shift_dr(cmd_data, self.DR_LENGTH)
-            
-            # Wait for AXI transaction to complete
-            time.sleep(0.01)
-            
-            logger.info("Write operation completed")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Write operation failed: {e}")
-            return False
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"JTAG Write: Addr=0x{addr:08x}, Data=0x{data:08x}")
+        return self.write_fast(self.prepare_write(addr), data)
+    
+    def prepare_write(self, addr: int) -> bytes:
+        """Precompute the command and address fields of a write for write_fast()"""
+        # Returned to the caller rather than stored, so threads sharing the
+        # bridge can prepare different addresses
+        return struct.pack('<II', self.CMD_WRITE, addr & 0xFFFFFFFF)
+    
+    def write_fast(self, write_hdr: bytes, data: int) -> bool:
+        """Perform AXI write using a header from prepare_write()"""
+        with self._lock:
+            try:
+                # Select USER1 instruction
+                self._select_user1(sync=False)
+                
+                # Shift command into DR and idle while the AXI write runs;
+                # writes return no data, so the buffer is only synchronized
+                # on the next read or flush(), or once it holds
+                # MAX_PENDING_WRITES writes
+                self._shift_dr_96(write_hdr + struct.pack('<I', data & 0xFFFFFFFF), sync=False)
+                self._run_clock(self.AXI_WAIT_CYCLES, sync=False)
+                self._flush_pending = True
+                self._pending_writes += 1
+                
+                logger.debug("Write operation queued")
+                if self._pending_writes >= self.MAX_PENDING_WRITES:
+                    return self.flush()
+                return True
+                
+            except Exception as e:
+                logger.error(f"Write operation failed: {e}")
+                self._current_ir = None
+                return False
     
     def read(self, addr: int) -> Optional[int]:
         """Perform AXI read operation via JTAG"""
-        try:
-            logger.info(f"JTAG Read: Addr=0x{addr:08x}")
-            
-            # Select USER1 instruction
-            self._select_user1()
-            
-            # Pack read command
-            cmd_data = self._pack_command(self.CMD_READ, addr, 0)
-            
-            # Shift read command into DR
-            self.jtag.shift_dr(cmd_data, self.DR_LENGTH)
-            
-            # Wait for AXI transaction to complete
-            time.sleep(0.01)
-            
-            # Shift again to get the read result
-            response = self.jtag.shift_dr(0, self.DR_LENGTH)
-            
-            # Unpack the response
-            status, read_data = self._unpack_response(response)
-            
-            logger.info(f"Read operation completed: Data=0x{read_data:08x}, Status=0x{status:08x}")
-            return read_data
-            
-        except Exception as e:
-            logger.error(f"Read operation failed: {e}")
-            return None
+        with self._lock:
+            try:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"JTAG Read: Addr=0x{addr:08x}")
+                
+                # Select USER1 instruction
+                self._select_user1(sync=False)
+                
+                # Pack read command
+                cmd_data = self._pack_command(self.CMD_READ, addr, 0)
+                
+                # Shift the command and a NOP in one transfer together with any
+                # buffered writes; the bridge returns the read data on the NOP,
+                # so idle in between until the AXI read has completed
+                _, response = self._shift_dr_pair(cmd_data, self._nop_cmd, self.DR_LENGTH,
+                                                  idle_cycles=self.AXI_WAIT_CYCLES)
+                self._flush_pending = False
+                self._pending_writes = 0
+                _, read_data = self._unpack_response(response)
+                
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Read operation completed: Data=0x{read_data:08x}")
+                return read_data
+                
+            except Exception as e:
+                logger.error(f"Read operation failed: {e}")
+                self._current_ir = None
+                return None
+    
+    def write_read_many(self, addr: int, values: list) -> Optional[list]:
+        """Write each value to addr and read it back, all in one transfer"""
+        with self._lock:
+            try:
+                write_hdr = self.prepare_write(addr)
+                read_cmd = self._pack_command(self.CMD_READ, addr, 0)
+                wait = ('tck', 0, self.AXI_WAIT_CYCLES)
+                
+                # Each value takes WRITE, READ and a NOP that shifts out the
+                # read data; the NOP is needed because the bridge ignores the
+                # data field of the scan that follows a READ. Idle after the
+                # WRITE and the READ so each AXI transaction completes first
+                ops = []
+                if self._current_ir != self.USER1_INSTRUCTION:
+                    ops.append(('ir', self.USER1_INSTRUCTION, self.IR_LENGTH))
+                    self._current_ir = self.USER1_INSTRUCTION
+                first_nop = len(ops) + 4
+                for value in values:
+                    ops.append(('dr', write_hdr + struct.pack('<I', value & 0xFFFFFFFF), self.DR_LENGTH))
+                    ops.append(wait)
+                    ops.append(('dr', read_cmd, self.DR_LENGTH))
+                    ops.append(wait)
+                    ops.append(('dr', self._nop_cmd, self.DR_LENGTH))
+                
+                responses = self.jtag.shift_batch(ops)
+                self._flush_pending = False
+                self._pending_writes = 0
+                
+                read_values = []
+                for response in responses[first_nop::5]:
+                    _, read_data = self._unpack_response(response)
+                    read_values.append(read_data)
+                return read_values
+                
+            except Exception as e:
+                logger.error(f"Batched write-read failed: {e}")
+                self._current_ir = None
+                return None
     
     def write_read_test(self, addr: int, test_data: int) -> bool:
         """Perform write-read test for LED register"""
@@ -311,7 +655,8 @@ class JTAGAXIBridge:
         test_data = test_data & 0xF
         logger.info(f"LED Write-Read test: Addr=0x{addr:08x}, LED Pattern=0b{test_data:04b}")
         
-        # Write test data
+        # Write test data; the write is buffered and sent together with
+        # the read command below in a single transfer
         if not self.write(addr, test_data):
             return False
         
@@ -332,8 +677,28 @@ class JTAGAXIBridge:
 class SVFPlayer:
     """SVF file player for JTAG operations"""
     
+    # Maximum number of queued shifts per bulk transfer
+    BATCH_SIZE = 64
+    
+    # SIR/SDR with TDI data: groups are (IR|DR, length, hex TDI)
+    _SHIFT_RE = re.compile(rb'^S(IR|DR)\s+(\d+)\b[^;]*?\bTDI\s*\(\s*([0-9A-Fa-f]+)\s*\)',
+                           re.IGNORECASE)
+    
     def __init__(self, jtag_interface: JTAGInterface):
         self.jtag = jtag_interface
+        self._queue: list[tuple[str, Union[int, bytes], int]] = []
+    
+    def _enqueue(self, kind: str, data: Union[int, bytes], length: int) -> None:
+        """Queue a shift operation, flushing when the batch is full"""
+        self._queue.append((kind, data, length))
+        if len(self._queue) >= self.BATCH_SIZE:
+            self._flush()
+    
+    def _flush(self) -> None:
+        """Send all queued shift operations as one bulk transfer"""
+        if self._queue:
+            self.jtag.shift_batch(self._queue)
+            self._queue = []
     
     def play_svf_file(self, filename: str) -> bool:
         """Play SVF file through JTAG interface"""
@@ -344,21 +709,32 @@ class SVFPlayer:
                 logger.error(f"SVF file not found: {filename}")
                 return False
             
-            with open(filename, 'r') as f:
-                lines = f.readlines()
-            
-            for line_num, line in enumerate(lines, 1):
-                line = line.strip()
-                
-                # Skip comments and empty lines
-                if not line or line.startswith('//') or line.startswith('!'):
-                    continue
-                
-                try:
-                    self._process_svf_command(line)
-                except Exception as e:
-                    logger.error(f"Error processing line {line_num}: {line}, Error: {e}")
-                    return False
+            self._queue = []
+            
+            # mmap cannot map an empty file
+            if os.path.getsize(filename) == 0:
+                logger.info("SVF file playback completed successfully")
+                return True
+            
+            # Map the file instead of reading all lines into memory
+            with open(filename, 'rb') as f, \
+                 mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for line_num, line in enumerate(iter(mm.readline, b''), 1):
+                    line = line.strip()
+                    
+                    # Skip comments and empty lines
+                    if not line or line.startswith((b'//', b'!')):
+                        continue
+                    
+                    try:
+                        self._process_svf_command(line)
+                    except Exception as e:
+                        logger.error(f"Error processing line {line_num}: "
+                                     f"{line.decode(errors='replace')}, Error: {e}")
+                        return False
+            
+            # Send any operations still queued at end of file
+            self._flush()
             
             logger.info("SVF file playback completed successfully")
             return True
@@ -367,45 +743,38 @@ class SVFPlayer:
             logger.error(f"SVF playback failed: {e}")
             return False
     
-    def _process_svf_command(self, command: str) -> None:
+    def _process_svf_command(self, command: bytes) -> None:
         """Process a single SVF command"""
         # This is a simplified SVF parser - a full implementation would be more complex
+        match = self._SHIFT_RE.match(command)
+        if match:
+            register, length, tdi_data = match.groups()
+            length = int(length)
+            if register.upper() == b'IR':
+                # Shift Instruction Register
+                self._enqueue('ir', int(tdi_data, 16), length)
+            else:
+                # Shift Data Register
+                self._enqueue('dr', _hex_to_scan_bytes(tdi_data.decode('ascii'), length), length)
+            return
+        
         parts = command.split()
         if not parts:
             return
         
         cmd = parts[0].upper()
         
-        if cmd == 'SIR':
-            # Shift Instruction Register
-            length = int(parts[1])
-            if 'TDI' in command:
-                tdi_start = command.find('(', command.find('TDI')) + 1
-                tdi_end = command.find(')', tdi_start)
-                tdi_data = command[tdi_start:tdi_end]
-                data = int(tdi_data, 16)
-                self.jtag.shift_ir(data, length)
-        
-        elif cmd == 'SDR':
-            # Shift Data Register
-            length = int(parts[1])
-            if 'TDI' in command:
-                tdi_start = command.find('(', command.find('TDI')) + 1
-                tdi_end = command.find(')', tdi_start)
-                tdi_data = command[tdi_start:tdi_end]
-                data = int(tdi_data, 16)
-                self.jtag.shift_dr(data, length)
-        
-        elif cmd == 'STATE':
+        if cmd == b'STATE':
             # State transitions - simplified handling
-            if 'RESET' in command:
+            if b'RESET' in command:
+                self._flush()
                 self.jtag.reset_tap()
         
-        elif cmd == 'RUNTEST':
-            # Run test - simplified as delay
+        elif cmd == b'RUNTEST':
+            # Run test - clock TCK in Run-Test/Idle as part of the batch
             if len(parts) > 1:
                 cycles = int(parts[1])
-                time.sleep(cycles * 0.000001)  # Assume 1MHz clock
+                self._enqueue('tck', 0, cycles)
 
 def main():
     """Main function with example usage"""
@@ -445,8 +814,11 @@ def main():
             if args.addr is None or args.data is None:
                 logger.error("Write operation requires --addr and --data")
                 return 1
-            success = bridge.write(args.addr, args.data)
-            return 0 if success else 1
+            success = bridge.write(args.addr, args.data) and bridge.flush()
+            if success:
+                logger.info(f"Wrote 0x{args.data:08x} to 0x{args.addr:08x}")
+                return 0
+            return 1
         
         elif args.action == 'read':
             if args.addr is None:
@@ -467,23 +839,18 @@ def main():
             led_patterns = [0x0, 0xF, 0xA, 0x5, 0x1, 0x2, 0x4, 0x8]
             pattern_names = ["OFF", "ALL_ON", "ALT1", "ALT2", "LED0", "LED1", "LED2", "LED3"]
             
-            for pattern, name in zip(led_patterns, pattern_names):
-                logger.info(f"Testing LED pattern {name}: 0b{pattern:04b}")
-                write_success = bridge.write(base_addr, pattern)
-                if write_success:
-                    # Wait a bit for the change
-                    time.sleep(0.1)
-                    read_data = bridge.read(base_addr)
-                    if read_data is not None and (read_data & 0xF) == pattern:
-                        logger.info(f"✓ Pattern {name} verified")
-                    else:
-                        logger.error(f"✗ Pattern {name} failed: expected {pattern:01x}, got {read_data & 0xF if read_data else 'None':01x}")
-                        test_passed = False
+            # Write and read back every pattern in a single transfer
+            read_values = bridge.write_read_many(base_addr, led_patterns)
+            if read_values is None:
+                logger.error("✗ Failed to run LED pattern tests")
+                return 1
+            
+            for pattern, name, read_data in zip(led_patterns, pattern_names, read_values):
+                if (read_data & 0xF) == pattern:
+                    logger.info(f"✓ Pattern {name} verified")
                 else:
-                    logger.error(f"✗ Failed to write pattern {name}")
+                    logger.error(f"✗ Pattern {name} failed: expected {pattern:01x}, got {read_data & 0xF:01x}")
                     test_passed = False
-                
-                time.sleep(0.2)  # Visual delay for LEDs
             
             if test_passed:
                 logger.info("All LED tests passed!")